@@ -1,110 +1,421 @@
-import requests
-import csv
-import time
+import asyncio
 import os
-import random
+import time
+from functools import lru_cache
+
+import aiohttp
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv
+from rapidfuzz import fuzz
+from sqlalchemy import select
+from yarl import URL
+
 from backend.database import SessionLocal
 from backend.models import Provider
-from backend.fraud_engine import calculate_fraud_risk
+from backend.fraud_engine import calculate_fraud_risk, calculate_fraud_risk_batch
+
+API_URL = "https://projects.propublica.org/nonprofits/api/v2/search.json"
+# Static query parts quoted once; per-call code only appends q/page
+SEARCH_URL = URL(API_URL).with_query({"state[id]": "MN"})
+HEADERS = {"User-Agent": "Mozilla/5.0 (Educational Project)"}
+CSV_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "providers.csv")
+# Prepared (filtered + typed) licensing frame cached next to the CSV
+PARQUET_CACHE = os.path.join(os.path.dirname(CSV_FILE), "providers_minneapolis.parquet")
+
+# Only the columns the pipeline actually uses; Capacity parsed at read time
+CSV_COLS = ['License Holder', 'License Number', 'License Type',
+            'AddressLine1', 'City', 'Capacity']
+
+# Fuzzy-match cutoff for pairing a license holder with a ProPublica org
+MATCH_THRESHOLD = 0.6
+# Polite concurrency cap so we don't hammer the ProPublica API
+MAX_CONCURRENCY = 5
+
+# Transient upstream errors worth retrying with exponential backoff
+RETRY_STATUSES = {502, 503, 504}
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Successful lookups are cached for an hour so repeat pipeline runs and
+# duplicate holder names skip the network round-trip entirely
+LOOKUP_TTL = 3600
+_lookup_cache = {}
+
+
+async def _fetch_json(session, url):
+    """
+    GETs a prepared ProPublica URL over the shared keep-alive session,
+    retrying transient 5xx/connection errors with backoff so a single
+    hiccup doesn't force a full pipeline re-run.
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with session.get(
+                url,
+                headers=HEADERS,
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRY_STATUSES or attempt == MAX_RETRIES - 1:
+                raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES - 1:
+                raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+@lru_cache(maxsize=1024)
+def _similarity(a: str, b: str) -> float:
+    """Memoized similarity on [0, 1]; callers pass lowercased strings.
+
+    rapidfuzz runs the ratio in compiled C++ rather than pure Python,
+    10-50x faster per call than difflib.SequenceMatcher.
+    """
+    return fuzz.ratio(a, b) / 100.0
+
+
+async def get_irs_data(session, sem, name):
+    """
+    Looks up a license holder on ProPublica and returns the best fuzzy match.
+
+    Returns:
+        Tuple: (org dict or None, similarity score). None when no org
+        clears MATCH_THRESHOLD or the request fails.
+    """
+    cached = _lookup_cache.get(name)
+    if cached is not None and time.monotonic() - cached[0] < LOOKUP_TTL:
+        return cached[1]
+
+    async with sem:
+        try:
+            data = await _fetch_json(session, SEARCH_URL.update_query(q=name))
+        except Exception as e:
+            print(f"Lookup failed for '{name}': {e}")
+            return None, 0.0
+        # Small pause inside the semaphore window keeps request spacing polite
+        await asyncio.sleep(0.1)
+
+    best_org, best_score = None, 0.0
+    name_lower = name.lower()
+    for org in data.get("organizations", []):
+        org_name = org.get("name", "").lower()
+        if name_lower == org_name:
+            best_org, best_score = org, 1.0
+            break
+        # Length gate: fuzz.ratio is 2*matches/(len1+len2), so the best
+        # possible score is 1 - |len1-len2|/(len1+len2); skip the
+        # quadratic matcher only when even that falls below the threshold
+        if abs(len(name_lower) - len(org_name)) > (
+                (1 - MATCH_THRESHOLD) * (len(name_lower) + len(org_name))):
+            continue
+        score = _similarity(name_lower, org_name)
+        if score > best_score:
+            best_org, best_score = org, score
+
+    result = (None, best_score) if best_score < MATCH_THRESHOLD else (best_org, best_score)
+    _lookup_cache[name] = (time.monotonic(), result)
+    return result
+
+
+def _splitmix64(x):
+    """Deterministic 64-bit integer mixer (SplitMix64)."""
+    x = (x + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+
+def _license_seed(license_number):
+    """
+    Maps a license number to a stable RNG seed. Built-in hash() is salted
+    per interpreter run for strings, which silently broke determinism
+    across restarts; mixing the numeric part through SplitMix64 is stable.
+    """
+    digits = ''.join(ch for ch in str(license_number) if ch.isdigit())
+    return _splitmix64(int(digits) if digits else 0)
+
+
+def generate_mock_spending(license_number, revenue):
+    """
+    Synthesizes mock licensing status and payment history for a provider.
+
+    Seeded on the license number, so repeat runs produce identical data,
+    and all amounts come from a single vectorized rng.uniform draw
+    instead of a per-payment Python loop.
+
+    Returns:
+        Tuple: (status str, payments list of {'amount', 'date'} dicts)
+    """
+    rng = np.random.default_rng(_license_seed(license_number))
+    status = "Inactive" if rng.random() < 0.25 else "Active"
+    num_payments = int(rng.integers(1, 16))
+
+    payments = []
+    if revenue > 0:
+        base_pay = revenue / num_payments
+        amounts = rng.uniform(base_pay * 0.5, base_pay * 1.5, size=num_payments)
+        payments = [{"amount": float(a), "date": "2024-01-01"} for a in amounts]
+
+    return status, payments
+
+
+@lru_cache(maxsize=4096)
+def _compute_row_summary(license_number, revenue, ein, capacity):
+    """
+    Mock spending plus rule scoring for one provider, memoized on its
+    deterministic inputs so repeat pipeline runs in the same process
+    skip the whole recompute.
+
+    Returns:
+        Tuple: (status, risk_score, risk_factors)
+    """
+    status, payments = generate_mock_spending(license_number, revenue)
+    risk_score, risk_factors = calculate_fraud_risk({
+        "revenue": revenue,
+        "capacity": capacity,
+        "status": status,
+        "ein": ein,
+        "payments": payments
+    })
+    return status, risk_score, risk_factors
+
 
-def get_minneapolis_child_care(query="child care", city_filter="minneapolis", limit=20):
+def _load_licensing_frame():
+    """
+    Loads the filtered, typed Minneapolis licensing frame. A parquet
+    cache keyed on the CSV's mtime lets warm starts skip the parse,
+    filter and type coercion entirely.
+    """
+    if (os.path.exists(PARQUET_CACHE)
+            and os.path.getmtime(CSV_FILE) <= os.path.getmtime(PARQUET_CACHE)):
+        return pd.read_parquet(PARQUET_CACHE)
+
+    # Read straight into an Arrow table and filter there: table.filter
+    # reuses the column buffers, so only the Minneapolis rows are ever
+    # materialized in pandas (no full-frame boolean-mask .copy)
+    table = pyarrow.csv.read_csv(
+        CSV_FILE,
+        convert_options=pyarrow.csv.ConvertOptions(
+            include_columns=CSV_COLS,
+            column_types={'Capacity': pa.float32()},
+        ),
+    )
+    mask = pc.equal(pc.utf8_lower(table['City']), 'minneapolis')
+    df = table.filter(mask).to_pandas()
+    # Coerce types and fill gaps once at load; the scoring loop then
+    # reads pre-typed fields with no str()/getattr fixups
+    df['Capacity'] = df['Capacity'].fillna(0).astype('int32')
+    df['License Number'] = df['License Number'].astype(str)
+    df['AddressLine1'] = df['AddressLine1'].fillna('N/A')
+
+    df.to_parquet(PARQUET_CACHE, compression='zstd')
+    return df
+
+
+async def run_pipeline_async():
+    """
+    Reads the licensing CSV, enriches the biggest Minneapolis providers with
+    ProPublica filing data (all fetches in flight concurrently), then scores
+    and saves them to the database.
+    """
+    df = _load_licensing_frame()
+    # Heap-based top-20 selection: O(N log 20) vs a full O(N log N) sort
+    top_providers = df.nlargest(20, 'Capacity')
+    # itertuples avoids boxing each row into a Series; spaces in headers
+    # become underscores so the fields stay attribute-accessible
+    top_providers.columns = [c.replace(' ', '_') for c in top_providers.columns]
+
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [
+            get_irs_data(session, sem, row.License_Holder)
+            for row in top_providers.itertuples(index=False)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    db = SessionLocal()
+    providers = []
+    try:
+        # One SELECT scoped to this batch's license numbers for the dedup
+        # check, instead of pulling the whole column
+        nums = list(top_providers['License_Number'])
+        existing = {x for (x,) in db.execute(
+            select(Provider.license_number).where(Provider.license_number.in_(nums))
+        )}
+
+        for row, result in zip(top_providers.itertuples(index=False), results):
+            if isinstance(result, Exception):
+                print(f"Fetch failed for '{row.License_Holder}': {result}")
+                continue
+            org, score = result
+
+            license_num = row.License_Number
+            if license_num in existing:
+                continue
+
+            ein = str(org.get("ein")) if org else None
+            revenue = float(org.get("revenue", 0) or 0) if org else 0.0
+            capacity = int(row.Capacity)
+
+            # Mock spending + rule scoring, cached per license number
+            status, risk_score, risk_factors = _compute_row_summary(
+                license_num, revenue, ein, capacity
+            )
+
+            provider = Provider(
+                license_holder=row.License_Holder,
+                license_number=license_num,
+                address=row.AddressLine1,
+                city=row.City,
+                capacity=capacity,
+                ein=ein,
+                revenue=int(revenue),
+                risk_score=risk_score,
+                risk_score_q=int(round(risk_score)),
+                status=status
+            )
+
+            providers.append(provider)
+
+        # One multi-row INSERT, no per-instance identity-map bookkeeping
+        db.bulk_save_objects(providers)
+        db.commit()
+        print(f"\nPipeline complete. Saved {len(providers)} providers to database.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def run_pipeline():
+    """Synchronous entry point for the async pipeline."""
+    asyncio.run(run_pipeline_async())
+
+
+async def get_minneapolis_child_care(query="child care", city_filter="minneapolis", limit=20):
     """
     Fetches nonprofits in MN matching the query, then filters by city locally.
     Processes fraud risk and saves to database.
     """
-    base_url = "https://projects.propublica.org/nonprofits/api/v2/search.json"
-    
-    params = {
-        "q": query,
-        "state[id]": "MN",
-        "page": 0
-    }
-    headers = {"User-Agent": "Mozilla/5.0 (Educational Project)"}
+    search_url = SEARCH_URL.update_query(q=query)
+    page = 0
 
     results = []
+    rows = []
     db = SessionLocal()
-    
+
     print(f"Searching for '{query}' in {city_filter.title()}, MN...")
 
     try:
-        while len(results) < limit:
-            response = requests.get(base_url, params=params, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            orgs = data.get("organizations", [])
-            
-            if not orgs:
-                print("No more pages available from API.")
-                break
-            
-            for org in orgs:
-                org_city = org.get("city", "").lower()
-                
-                if org_city == city_filter.lower():
-                    ein = str(org.get("ein"))
-                    # Skip if already in DB
-                    existing = db.query(Provider).filter(Provider.ein == ein).first()
-                    if existing:
-                        continue
-
-                    # Mock some additional data for fraud calculation
-                    # In a real app, this would come from licensing/spending DBs
-                    revenue = float(org.get("revenue", 0) or random.randint(50000, 200000))
-                    capacity = random.randint(5, 50)
-                    status = random.choice(["Active", "Active", "Active", "Inactive"])
-                    
-                    # Mock payments for Rule 3, 4, 5
-                    num_payments = random.randint(1, 15)
-                    payments = []
-                    if revenue > 0:
-                        base_pay = revenue / num_payments
-                        for _ in range(num_payments):
-                            payments.append({
-                                "amount": base_pay * random.uniform(0.5, 1.5),
-                                "date": "2024-01-01"
-                            })
-
-                    risk_data = {
-                        "revenue": revenue,
-                        "capacity": capacity,
-                        "status": status,
-                        "ein": ein,
-                        "payments": payments
-                    }
-                    
-                    risk_score, risk_factors = calculate_fraud_risk(risk_data)
-
-                    provider = Provider(
-                        license_holder=org.get("name"),
-                        license_number=f"LIC-{ein}", # Mock license number
-                        address=org.get("address"),
-                        city=org.get("city"),
-                        capacity=capacity,
-                        ein=ein,
-                        revenue=int(revenue),
-                        risk_score=risk_score,
-                        status=status
-                    )
-                    
-                    db.add(provider)
-                    results.append(org.get("name"))
-                    
-                    if len(results) >= limit:
-                        break
-            
-            print(f"Checked page {params['page']}. Found {len(results)} matches so far.")
-            params["page"] += 1
-            time.sleep(0.5)
+        # One SELECT for the dedup check instead of one per org
+        existing_eins = {r[0] for r in db.query(Provider.ein).all()}
+
+        # Pre-draw every mock sample in one shot: batched PCG64 array
+        # draws are far cheaper than per-org random.* calls
+        rng = np.random.default_rng()
+        revenue_arr = rng.integers(50000, 200001, size=limit)
+        capacity_arr = rng.integers(5, 51, size=limit)
+        status_arr = rng.choice(["Active", "Active", "Active", "Inactive"], size=limit)
+        num_payments_arr = rng.integers(1, 16, size=limit)
+        pay_mult = rng.uniform(0.5, 1.5, size=(limit, int(num_payments_arr.max())))
+
+        async with aiohttp.ClientSession() as session:
+            while len(results) < limit:
+                data = await _fetch_json(session, search_url.update_query(page=page))
+
+                orgs = data.get("organizations", [])
 
+                if not orgs:
+                    print("No more pages available from API.")
+                    break
+
+                for org in orgs:
+                    org_city = org.get("city", "").lower()
+
+                    if org_city == city_filter.lower():
+                        ein = str(org.get("ein"))
+                        # Skip if already in DB (or seen earlier this run)
+                        if ein in existing_eins:
+                            continue
+                        existing_eins.add(ein)
+
+                        # Mock some additional data for fraud calculation
+                        # In a real app, this would come from licensing/spending DBs
+                        i = len(results)
+                        revenue = float(org.get("revenue", 0) or revenue_arr[i])
+                        capacity = int(capacity_arr[i])
+                        status = str(status_arr[i])
+
+                        # Mock payments for Rule 3, 4, 5 (one ndarray multiply)
+                        num_payments = int(num_payments_arr[i])
+                        payments = []
+                        if revenue > 0:
+                            base_pay = revenue / num_payments
+                            amounts = base_pay * pay_mult[i, :num_payments]
+                            payments = [{"amount": float(a), "date": "2024-01-01"}
+                                        for a in amounts]
+
+                        # Collect the raw row now; scoring happens in one
+                        # vectorized batch after paging finishes
+                        rows.append({
+                            "name": org.get("name"),
+                            "address": org.get("address"),
+                            "city": org.get("city"),
+                            "revenue": revenue,
+                            "capacity": capacity,
+                            "status": status,
+                            "_status_inactive": status != "Active",
+                            "ein": ein,
+                            "payments": payments
+                        })
+                        results.append(org.get("name"))
+
+                        if len(results) >= limit:
+                            break
+
+                print(f"Checked page {page}. Found {len(results)} matches so far.")
+                page += 1
+                await asyncio.sleep(0.5)
+
+        # Score every collected org in one vectorized pass
+        providers = []
+        if rows:
+            scores, _ = calculate_fraud_risk_batch(pd.DataFrame(rows))
+            providers = [
+                Provider(
+                    license_holder=r["name"],
+                    license_number=f"LIC-{r['ein']}", # Mock license number
+                    address=r["address"],
+                    city=r["city"],
+                    capacity=r["capacity"],
+                    ein=r["ein"],
+                    revenue=int(r["revenue"]),
+                    risk_score=float(score),
+                    risk_score_q=int(round(score)),
+                    status=r["status"]
+                )
+                for r, score in zip(rows, scores)
+            ]
+
+        # One multi-row INSERT, no per-instance identity-map bookkeeping
+        db.bulk_save_objects(providers)
         db.commit()
         print(f"\nSuccess! Saved {len(results)} providers to database.")
-        
+
     except Exception as e:
         print(f"Error: {e}")
         db.rollback()
     finally:
         db.close()
 
+
 if __name__ == "__main__":
-    get_minneapolis_child_care()
+    asyncio.run(get_minneapolis_child_care())
@@ -1,14 +1,186 @@
-import numpy as np
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, Tuple, Any, List
+
+import numpy as np
 import pandas as pd
 
-# Mock list of excluded entities for Rule 1
-EXCLUDED_EINS = ["411240047", "999999999"] 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Mock set of excluded entities for Rule 1 (frozenset: O(1) membership)
+EXCLUDED_EINS: frozenset = frozenset({"411240047", "999999999"})
+
+# Status strings come from a handful of fixed values, so cache the
+# lowercasing instead of allocating a new string per call
+_status_lower = lru_cache(maxsize=64)(str.lower)
+
+# Below this row count, process-pool startup costs more than it saves
+PARALLEL_THRESHOLD = 50_000
+
+def _payment_stats(payments: List[Dict]) -> Tuple[float, bool]:
+    """
+    Computes (coefficient of variation, has IQR outliers) for a payment
+    list in a single NumPy pass. Returns (0.0, False) when there are too
+    few payments for either statistic.
+    """
+    payment_cv = 0.0
+    has_outliers = False
+
+    if payments:
+        amounts = np.fromiter((p['amount'] for p in payments),
+                              dtype=np.float64, count=len(payments))
+
+        if amounts.size >= 4:
+            q1, q3 = np.quantile(amounts, [0.25, 0.75])
+            iqr = q3 - q1
+            upper_bound = q3 + 1.5 * iqr
+            lower_bound = q1 - 1.5 * iqr
+            has_outliers = bool(((amounts > upper_bound) | (amounts < lower_bound)).any())
+
+        if amounts.size > 1:
+            mean_val = amounts.mean()
+            if mean_val > 0:
+                payment_cv = float(amounts.std() / mean_val)
+
+    return payment_cv, has_outliers
+
+
+if njit is not None:
+    # GIL-free parallel scoring loop; cache=True persists the compiled
+    # kernel across processes. Weights mirror the rules table below.
+    @njit(parallel=True, cache=True)
+    def _score_rows(excluded, inactive, has_revenue, revenue,
+                    payment_count, payment_cv, has_outliers):
+        n = revenue.size
+        out = np.zeros(n, np.float64)
+        for i in prange(n):
+            s = 0.0
+            if excluded[i] and has_revenue[i]:
+                s += 50.0
+            if inactive[i] and has_revenue[i]:
+                s += 25.0
+            if payment_count[i] < 3 and revenue[i] > 100_000:
+                s += 10.0
+            if has_outliers[i]:
+                s += 5.0
+            if payment_cv[i] > 1.5:
+                s += 5.0
+            out[i] = min(s, 100.0)
+        return out
+else:
+    _score_rows = None
+
+
+def _score_batch(df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """Single-process body of calculate_fraud_risk_batch."""
+    revenue = df['revenue'].to_numpy(dtype=np.float64)
+    has_revenue = revenue > 0
+
+    # Callers that already know activity pass the boolean column and the
+    # per-call string lowering disappears
+    if '_status_inactive' in df.columns:
+        inactive = df['_status_inactive'].to_numpy(dtype=bool)
+    else:
+        inactive = df['status'].str.lower().ne('active').to_numpy()
+    excluded = df['ein'].isin(EXCLUDED_EINS).to_numpy()
+
+    if 'payments' in df.columns:
+        # Ragged payment lists: stats still need one pass per row
+        stats = [_payment_stats(p) for p in df['payments']]
+        payment_count = df['payments'].map(len).to_numpy(dtype=np.int64)
+        payment_cv = np.fromiter((s[0] for s in stats),
+                                 dtype=np.float64, count=len(stats))
+        has_outliers = np.fromiter((s[1] for s in stats),
+                                   dtype=bool, count=len(stats))
+    else:
+        payment_count = df['payment_count'].to_numpy(dtype=np.int64)
+        payment_cv = df['payment_cv'].to_numpy(dtype=np.float64)
+        has_outliers = df['has_outliers'].to_numpy(dtype=bool)
+
+    # Same rules and weights as the scalar path, as (mask, points, label)
+    rules = [
+        (excluded & has_revenue, 50.0,
+         "CRITICAL: Excluded entity receiving payments"),
+        (inactive & has_revenue, 25.0,
+         "Inactive entity receiving payments"),
+        ((payment_count < 3) & (revenue > 100_000), 10.0,
+         "Suspicious payment frequency (High revenue with few payments)"),
+        (has_outliers, 5.0,
+         "Outlier payment amounts detected (IQR method)"),
+    ]
+    cv_mask = payment_cv > 1.5
+
+    if _score_rows is not None:
+        scores = _score_rows(excluded, inactive, has_revenue, revenue,
+                             payment_count, payment_cv, has_outliers)
+    else:
+        # Branchless: stack the rule masks into an (N, rules) matrix and
+        # take a single dot product with the weight vector instead of one
+        # conditional add per rule
+        masks = np.stack([mask for mask, _, _ in rules] + [cv_mask], axis=1)
+        weights = np.fromiter((points for _, points, _ in rules),
+                              dtype=np.float64, count=len(rules))
+        weights = np.append(weights, 5.0)
+        scores = np.minimum(masks.astype(np.float64) @ weights, 100.0)
+
+    factors = []
+    for i in range(len(df)):
+        row_factors = [label for mask, _, label in rules if mask[i]]
+        if cv_mask[i]:
+            row_factors.append(f"High payment variance (CV: {payment_cv[i]:.2f})")
+        factors.append("; ".join(row_factors))
+
+    return scores, factors
+
+
+def calculate_fraud_risk_batch(df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """
+    Vectorized rule engine for scoring many providers in one shot.
+
+    Expects one row per provider with columns:
+        - 'revenue': float
+        - 'status': str (or a precomputed '_status_inactive' bool column)
+        - 'ein': str
+        - either a raw 'payments' column (list of {'amount', 'date'}), or
+          precomputed 'payment_count' / 'payment_cv' / 'has_outliers'
+
+    All five rules are evaluated as boolean masks so the interpreter is
+    entered once per rule, not once per provider. Frames past
+    PARALLEL_THRESHOLD rows are split across worker processes.
+
+    Returns:
+        Tuple: (ndarray of risk scores, list of joined factor strings)
+    """
+    if len(df) < PARALLEL_THRESHOLD:
+        return _score_batch(df)
+
+    workers = os.cpu_count() or 1
+    # Split by iloc ranges: np.array_split on the frame itself would
+    # hand the workers bare ndarrays, not DataFrames
+    chunks = [df.iloc[idx] for idx in np.array_split(np.arange(len(df)), workers)
+              if len(idx)]
+    # Spawn, not fork: once numba's TBB threading layer has run in this
+    # process (any earlier _score_batch call), forked children hang the
+    # interpreter in TBB teardown at exit
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")) as pool:
+        parts = list(pool.map(_score_batch, chunks))
+
+    scores = np.concatenate([p[0] for p in parts])
+    factors = [f for p in parts for f in p[1]]
+    return scores, factors
+
 
 def calculate_fraud_risk(data: Dict[str, Any], ml_model: Any = None) -> Tuple[float, str]:
     """
     Analyzes provider data and returns a probability (0-100) and reasons.
-    
+
     Args:
         data: Dict containing:
             - 'revenue': float
@@ -18,68 +190,42 @@ def calculate_fraud_risk(data: Dict[str, Any], ml_model: Any = None) -> Tuple[fl
             - 'payments': List[Dict] with 'amount' and 'date'
             - 'ein': str
         ml_model: Optional trained ML model for additional scoring.
-            
+
     Returns:
         Tuple: (Risk Score Float, Risk Factors String)
     """
-    score = 0.0
-    factors = []
-    
     revenue = data.get('revenue', 0)
     capacity = data.get('capacity', 0)
-    status = data.get('status', 'Unknown').lower()
     payments = data.get('payments', [])
-    ein = data.get('ein', '')
-    
-    # 1. Excluded entity receiving payments: +50 points (CRITICAL!)
-    if ein in EXCLUDED_EINS and revenue > 0:
-        score += 50
-        factors.append("CRITICAL: Excluded entity receiving payments")
-
-    # 2. Inactive entity receiving payments: +25 points
-    if status != 'active' and revenue > 0:
-        score += 25
-        factors.append("Inactive entity receiving payments")
-
-    # 3. Suspicious payment frequency (< 3 payments but >$100k): +10 points
-    if len(payments) < 3 and revenue > 100_000:
-        score += 10
-        factors.append("Suspicious payment frequency (High revenue with few payments)")
-
-    # 4. Outlier amounts (IQR method): +5 points
-    if len(payments) >= 4:
-        amounts = [p['amount'] for p in payments]
-        q1, q3 = np.percentile(amounts, [25, 75])
-        iqr = q3 - q1
-        upper_bound = q3 + 1.5 * iqr
-        lower_bound = q1 - 1.5 * iqr
-        if any(a > upper_bound or a < lower_bound for a in amounts):
-            score += 5
-            factors.append("Outlier payment amounts detected (IQR method)")
-
-    # 5. High payment variance (CV > 1.5): +5 points
-    if len(payments) > 1:
-        amounts = [p['amount'] for p in payments]
-        std_dev = np.std(amounts)
-        mean_val = np.mean(amounts)
-        if mean_val > 0:
-            cv = std_dev / mean_val
-            if cv > 1.5:
-                score += 5
-                factors.append(f"High payment variance (CV: {cv:.2f})")
+
+    # Thin wrapper over the batch engine: score a one-row frame so the
+    # rules live in exactly one place
+    payment_cv, has_outliers = _payment_stats(payments)
+    row = pd.DataFrame([{
+        'revenue': revenue,
+        '_status_inactive': _status_lower(data.get('status', 'Unknown')) != 'active',
+        'ein': data.get('ein', ''),
+        'payment_count': len(payments),
+        'payment_cv': payment_cv,
+        'has_outliers': has_outliers
+    }])
+    scores, factor_strings = calculate_fraud_risk_batch(row)
+    score = float(scores[0])
+    factors = [factor_strings[0]] if factor_strings[0] else []
 
     # ML Integration: Add ML score if model is provided
     if ml_model and len(payments) > 0:
         # Prepare lightweight feature vector for ML
         try:
-            # This is a placeholder for actual feature engineering
-            features = pd.DataFrame([{
-                'revenue': revenue,
-                'capacity': capacity,
-                'payment_count': len(payments),
-                'avg_payment': revenue / len(payments) if payments else 0
-            }])
-            ml_prob = ml_model.predict_proba(features)[0][1] * 100
+            # This is a placeholder for actual feature engineering;
+            # sklearn accepts a plain ndarray, skipping the one-row
+            # DataFrame construction overhead. Order: revenue, capacity,
+            # payment_count, avg_payment.
+            features = np.array(
+                [[revenue, capacity, len(payments), revenue / len(payments)]],
+                dtype=np.float32
+            )
+            ml_prob = ml_model.predict_proba(features)[0, 1] * 100
             score += ml_prob * 0.2  # ML score contributes 20% to the total points
             if ml_prob > 80:
                 factors.append(f"ML Classifier High Risk Flag ({ml_prob:.1f}%)")
@@ -88,5 +234,5 @@ def calculate_fraud_risk(data: Dict[str, Any], ml_model: Any = None) -> Tuple[fl
 
     # Cap score at 100%
     final_score = min(score, 100.0)
-    
-    return float(final_score), "; ".join(factors)
\ No newline at end of file
+
+    return float(final_score), "; ".join(factors)
@@ -1,28 +1,30 @@
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, precision_recall_curve, auc
-from sklearn.preprocessing import StandardScaler
 import joblib
 
 class FraudClassifier:
     def __init__(self):
-        # 'balanced' class_weight handles the imbalanced data (the 1% fraud cases)
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
+        # Histogram-based GBM bins the features once and fits far faster
+        # than a RandomForest at large N; 'balanced' class_weight handles
+        # the imbalanced data (the 1% fraud cases)
+        self.model = HistGradientBoostingClassifier(
+            max_iter=200,
+            max_depth=8,
+            learning_rate=0.05,
             class_weight='balanced',
-            random_state=42,
-            n_jobs=-1
+            early_stopping=True,
+            random_state=42
         )
-        self.scaler = StandardScaler()
 
     def train(self, df: pd.DataFrame, target_col='is_fraud'):
         """
-        Full training pipeline: Scaling -> Train/Test Split -> Random Forest
+        Full training pipeline: Train/Test Split -> Gradient Boosting.
+        Tree models are scale-invariant, so no scaler pass over X.
         """
         print("Starting training pipeline...")
-        
+
         # Feature separation
         X = df.drop(columns=[target_col])
         y = df[target_col]
@@ -32,16 +34,12 @@ class FraudClassifier:
             X, y, test_size=0.2, stratify=y, random_state=42
         )
 
-        # Scale Data
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-
         # Train
-        self.model.fit(X_train_scaled, y_train)
-        
+        self.model.fit(X_train, y_train)
+
         # Evaluate
-        self._evaluate(X_test_scaled, y_test)
-        
+        self._evaluate(X_test, y_test)
+
         return self.model
 
     def _evaluate(self, X_test, y_test):
@@ -49,13 +47,12 @@ class FraudClassifier:
         probs = self.model.predict_proba(X_test)[:, 1]
         precision, recall, _ = precision_recall_curve(y_test, probs)
         auprc = auc(recall, precision)
-        
+
         print(f"Model Training Complete.")
         print(f"AUPRC (Area Under Precision-Recall Curve): {auprc:.4f}")
-        
+
     def predict(self, new_data: pd.DataFrame):
-        scaled_data = self.scaler.transform(new_data)
-        return self.model.predict(scaled_data)
+        return self.model.predict(new_data)
 
     def save_model(self, path='model.pkl'):
-        joblib.dump(self.model, path)
\ No newline at end of file
+        joblib.dump(self.model, path)
@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, DateTime
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -18,7 +18,10 @@ class Provider(Base):
     ein = Column(String, nullable=True)
     revenue = Column(Integer, default=0)
 
-    risk_score = Column(Float, default=0.0)
+    risk_score = Column(Float, default=0.0, index=True)
+    # Quantized 0-100 copy of risk_score; all filtering/ordering happens
+    # on this tighter integer index, the float stays for display
+    risk_score_q = Column(SmallInteger, default=0, index=True)
     status = Column(String, default="Unknown")
 
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from backend import fraud_engine
+
+
+def _provider_frame(n: int) -> pd.DataFrame:
+    """Builds n provider rows with the precomputed payment columns."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        'revenue': rng.uniform(0, 300_000, n),
+        'status': np.where(rng.random(n) < 0.3, 'Inactive', 'Active'),
+        'ein': np.where(rng.random(n) < 0.1, '999999999', '123456789'),
+        'payment_count': rng.integers(0, 12, n),
+        'payment_cv': rng.uniform(0.0, 3.0, n),
+        'has_outliers': rng.random(n) < 0.2,
+    })
+
+
+def test_batch_at_parallel_threshold_matches_single_process(monkeypatch):
+    # Shrink the threshold so the process-pool path runs at test size;
+    # a frame of exactly PARALLEL_THRESHOLD rows must take it
+    monkeypatch.setattr(fraud_engine, 'PARALLEL_THRESHOLD', 32)
+    df = _provider_frame(32)
+
+    expected_scores, expected_factors = fraud_engine._score_batch(df)
+    scores, factors = fraud_engine.calculate_fraud_risk_batch(df)
+
+    assert np.array_equal(scores, expected_scores)
+    assert factors == expected_factors
+
+
+def test_batch_below_threshold_stays_single_process():
+    df = _provider_frame(8)
+    scores, factors = fraud_engine.calculate_fraud_risk_batch(df)
+
+    assert len(scores) == len(df)
+    assert len(factors) == len(df)
+    assert bool(((scores >= 0) & (scores <= 100)).all())